@@ -1,50 +1,97 @@
 """Analyze sleep data"""
 import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
 import datetime
-import pandas as pd
 
-from sleep_analysis.log_parser import (
-    parse_log,
-    export_single_weeks_csv,
-    compute_weekly_stats,
-    compute_overall_stats,
-    export_weeks_from_dataframe,
-    export_questions_table,
-    _prepare_stats_for_output,
-    _filter_non_empty_frames,
-)
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def _format_range(start: datetime.date, end: datetime.date) -> str:
     """Return date range label like '2025--01-01--01-07'."""
-    return f"{start.year:04d}--{start:%m-%d}--{end:%m-%d}"
+    return f"{start.year:04d}--{start.month:02d}-{start.day:02d}--{end.month:02d}-{end.day:02d}"
 
 
-def _week_range_for_date(d: datetime.date) -> tuple[datetime.date, datetime.date]:
-    """Return the Sunday-Saturday range containing ``d``."""
-    start = d - datetime.timedelta(days=(d.weekday() + 1) % 7)
-    end = start + datetime.timedelta(days=6)
-    return start, end
-
-
-def run_analysis(logfile: str, output_dir: str, label_files: bool = False) -> None:
+def run_analysis(
+    logfile: str,
+    output_dir: str,
+    label_files: bool = False,
+    use_cache: bool = False,
+    make_output_dir: bool = True,
+) -> "pd.DataFrame":
     """Parse ``logfile`` and write analysis outputs to ``output_dir``.
 
     When ``label_files`` is ``True`` the output filenames will include the date
-    range contained in the log.
+    range contained in the log. When ``use_cache`` is ``True`` the parsed log is
+    cached on disk and reused while the log file is unchanged. Callers that have
+    already created ``output_dir`` can pass ``make_output_dir=False``.
+
+    Returns the parsed dataframe so that callers can reuse it with
+    :func:`run_analysis_from_df`.
     """
+    # the parser is imported here rather than at module level so that
+    # ``--help`` and argument errors don't pay for loading pandas
+    from sleep_analysis.log_parser import parse_log
+
     # parse the raw log file into a dataframe
-    df = parse_log(logfile)
+    df = parse_log(logfile, use_cache=use_cache)
+    run_analysis_from_df(df, logfile, output_dir, label_files=label_files, make_output_dir=make_output_dir)
+    return df
+
+
+def run_analysis_from_df(
+    df: "pd.DataFrame",
+    logfile: str,
+    output_dir: str,
+    label_files: bool = False,
+    make_output_dir: bool = True,
+) -> None:
+    """Write analysis outputs for an already parsed ``logfile`` to ``output_dir``.
+
+    ``df`` must be the result of ``parse_log(logfile)``; ``logfile`` itself is
+    still needed for the raw per-week exports. ``df`` is not modified.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from sleep_analysis.log_parser import (
+        export_single_weeks_csv,
+        compute_weekly_stats,
+        compute_overall_stats,
+        export_weeks_from_dataframe,
+        export_questions_table,
+        _write_stats_tsv,
+        _write_tsv,
+    )
 
-    # ensure the output directory exists
-    os.makedirs(output_dir, exist_ok=True)
+    # the label columns below are added to a shallow copy so the caller's
+    # dataframe can be passed to another run unchanged
+    df = df.copy(deep=False)
 
-    df['week_by_log_dates'] = df.groupby('week_label')['date'].transform(
-        lambda s: _format_range(s.min(), s.max())
-    )
-    df['week'] = df['date'].apply(lambda d: _format_range(*_week_range_for_date(d)))
+    if make_output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # format each distinct range once and map the labels back onto the rows
+    log_ranges = df.groupby('week_label', sort=False)['date'].agg(['min', 'max'])
+    log_labels = {
+        label: _format_range(start, end)
+        for label, start, end in zip(log_ranges.index, log_ranges['min'], log_ranges['max'])
+    }
+    df['week_by_log_dates'] = df['week_label'].map(log_labels)
+
+    # Sunday-Saturday calendar week containing each date, computed column-wise
+    dates = pd.to_datetime(df['date'])
+    week_start = dates - pd.to_timedelta((dates.dt.weekday + 1) % 7, unit='D')
+    week_end = week_start + pd.Timedelta(days=6)
+    df['week'] = week_start.dt.strftime('%Y--%m-%d--') + week_end.dt.strftime('%m-%d')
+
+    # each week label repeats for every day of its week, so store the label
+    # columns as categoricals (small integer codes plus one copy of each label)
+    for col in ('week_label', 'week_by_log_dates', 'week'):
+        df[col] = df[col].astype('category')
 
     start: datetime.date = df['date'].min()
     end: datetime.date = df['date'].max()
@@ -57,51 +104,54 @@ def run_analysis(logfile: str, output_dir: str, label_files: bool = False) -> No
         data_name = f'data-{range_label}.tsv'
         stats_name = f'stats-{range_label}.tsv'
 
-    df_out = df.drop(columns=['week_label'])
-    df_out.to_csv(os.path.join(output_dir, data_name), sep='\t', index=False, lineterminator="\n")
+    # project away the internal header label while writing instead of
+    # building a copy of the frame without it
+    data_cols = [c for c in df.columns if c != 'week_label']
+    _write_tsv(df, os.path.join(output_dir, data_name), columns=data_cols)
     questions_name = 'data-with-questions.tsv'
     if label_files:
         questions_name = f'data-with-questions-{range_label}.tsv'
-    export_questions_table(df_out, os.path.join(output_dir, questions_name))
+    export_questions_table(df, os.path.join(output_dir, questions_name), columns=data_cols)
 
     weekly_stats: dict[str, pd.DataFrame] = compute_weekly_stats(df)
-    export_single_weeks_csv(logfile, os.path.join(output_dir, "single-weeks-by-log-range"))
-    export_weeks_from_dataframe(df, 'week_by_log_dates', os.path.join(output_dir, 'single-weeks-by-log-range'))
-    export_weeks_from_dataframe(df, 'week', os.path.join(output_dir, 'by-week'))
-    src = os.path.join(output_dir, 'single-weeks-by-log-range', 'stats-by-week_by_log_dates.tsv')
-    if os.path.exists(src):
-        os.replace(src, os.path.join(output_dir, 'stats-by-log-date-ranges.tsv'))
-    src = os.path.join(output_dir, 'by-week', 'stats-by-week.tsv')
-    if os.path.exists(src):
-        os.replace(src, os.path.join(output_dir, 'stats-by-week.tsv'))
+    log_range_dir = os.path.join(output_dir, 'single-weeks-by-log-range')
+
+    def _export_log_ranges() -> None:
+        # both exports write ``data-with-questions-<range>.csv`` into the same
+        # directory and the dataframe version must win, so they stay ordered
+        export_single_weeks_csv(logfile, log_range_dir)
+        export_weeks_from_dataframe(
+            df, 'week_by_log_dates', log_range_dir,
+            stats_path=os.path.join(output_dir, 'stats-by-log-date-ranges.tsv'),
+        )
+
+    # the log-range and calendar-week exports write to separate directories,
+    # so run them concurrently to overlap their file I/O
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(_export_log_ranges),
+            executor.submit(
+                export_weeks_from_dataframe, df, 'week', os.path.join(output_dir, 'by-week'),
+                stats_path=os.path.join(output_dir, 'stats-by-week.tsv'),
+            ),
+        ]
+        for future in futures:
+            future.result()
 
     if not label_files:
         # create additional stats using date ranges found in the log itself
-        log_rows: list[pd.DataFrame] = []
-        for label, wk_df in weekly_stats.items():
-            start = df[df['week_label'] == label]['date'].min()
-            end = df[df['week_label'] == label]['date'].max()
-            new_label = _format_range(start, end)
-            out_df = wk_df.copy()
-            out_df.insert(0, 'week_by_log_dates', new_label)
-            log_rows.append(out_df)
-
-        if log_rows:
-            valid_rows = _filter_non_empty_frames(log_rows)
-
-            if valid_rows:
-                by_log_df: pd.DataFrame = pd.concat(valid_rows, ignore_index=True)
-                out_df = _prepare_stats_for_output(by_log_df, 'week_by_log_dates')
-                out_df.to_csv(
-                    os.path.join(output_dir, 'stats-by-log-date-ranges.tsv'),
-                    sep='\t',
-                    index=False,
-                    lineterminator="\n")
+        if weekly_stats:
+            # concatenate the weekly frames as-is and add the label column once
+            # rather than copying every frame just to prepend its label
+            labels = [log_labels[label] for label in weekly_stats]
+            sizes = [len(wk_df) for wk_df in weekly_stats.values()]
+            by_log_df: pd.DataFrame = pd.concat(weekly_stats.values(), ignore_index=True)
+            by_log_df.insert(0, 'week_by_log_dates', np.repeat(labels, sizes))
+            _write_stats_tsv(by_log_df, os.path.join(output_dir, 'stats-by-log-date-ranges.tsv'), 'week_by_log_dates')
 
     # final summary across all weeks
     overall = compute_overall_stats(weekly_stats)
-    out_overall = _prepare_stats_for_output(overall)
-    out_overall.to_csv(os.path.join(output_dir, stats_name), sep='\t', index=False, lineterminator="\n")
+    _write_stats_tsv(overall, os.path.join(output_dir, stats_name))
 
 
 def main():
@@ -110,13 +160,27 @@ def main():
     parser.add_argument('--logfile', default='input/log.txt', help='Path to sleep log txt file')
     parser.add_argument('--output-dir', default='output', help='Directory for output files')
     parser.add_argument('--single-week-logfile', default='input/log-single-week.txt', help='Optional single week log file')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-parse log files instead of using cached results')
     args = parser.parse_args()
+    use_cache = not args.no_cache
 
-    run_analysis(args.logfile, args.output_dir, label_files=False)
+    os.makedirs(args.output_dir, exist_ok=True)
+    df = run_analysis(args.logfile, args.output_dir, label_files=False, use_cache=use_cache, make_output_dir=False)
 
     single_week_out = os.path.join(args.output_dir, 'single-week')
     if os.path.exists(args.single_week_logfile):
-        run_analysis(args.single_week_logfile, single_week_out, label_files=True)
+        os.makedirs(single_week_out, exist_ok=True)
+        if os.path.samefile(args.logfile, args.single_week_logfile):
+            # same log for both runs: skip parsing it a second time
+            run_analysis_from_df(df, args.single_week_logfile, single_week_out, label_files=True, make_output_dir=False)
+        else:
+            run_analysis(
+                args.single_week_logfile,
+                single_week_out,
+                label_files=True,
+                use_cache=use_cache,
+                make_output_dir=False,
+            )
 
 
 if __name__ == '__main__':
@@ -1,10 +1,15 @@
 import datetime
+import functools
+import hashlib
+import io
 import math
 import re
 import os
 import csv
+import pickle
 from typing import Dict, List, Iterable
 
+import numpy as np
 import pandas as pd
 
 QUESTION_TO_COLUMN = {
@@ -61,18 +66,49 @@ EXPECTED_TIMES = {
     'get_out_of_bed_time': datetime.time(11, 35),
 }
 
+# ``EXPECTED_TIMES`` as minutes since midnight, for computing offsets
+_EXPECTED_MINUTES = {col: t.hour * 60 + t.minute for col, t in EXPECTED_TIMES.items()}
+
 _TIME_RE = re.compile(r'^(\d{1,2})(?::(\d{2}))?(am|pm)?$', re.IGNORECASE)
+# A numbered question such as ``"1.2b. What time ...?"`` followed by its values;
+# every ``QUESTION_TO_COLUMN`` key has this shape
+_QUESTION_RE = re.compile(r'^(\d+(?:\.\d+)*[a-z]?\.\s[^?]*\?)(.*)$')
+# Used by ``save_week_log_annotations_as_markdown``: the month/day pairs of a
+# week header, and the number that starts a question line
+_HEADER_DATES_RE = re.compile(r'(\d{1,2})/(\d{1,2})-(?:[A-Za-z]{3})?(?:(\d{1,2})/)?(\d{1,2})')
+_QUESTION_NUM_RE = re.compile(r'^\s*\d+(?:\.\d+)*[a-z]?\.\s')
+
+# Time spellings that ``_TIME_RE`` doesn't accept: ``.`` as the separator,
+# optional seconds, and a spaced, dotted or single-letter am/pm suffix
+_TIME_ALT_RE = re.compile(
+    r'^(\d{1,2})[:.](\d{2})(?::(\d{2}))?\s*(?:([ap])\.?(?:m\.?)?)?$', re.IGNORECASE
+)
 
 # Matches week header lines such as ``"Fri4/25-Wed4/30"`` or ``"Thu6/19-Wed25"``
 # where the day-of-week prefix is optional for both the start and end dates. The
 # month/day pairs may also omit the month on the end date in which case the
-# start month is assumed.
+# start month is assumed. The groups capture the start month and day and the
+# (optional) end month and end day.
 _WEEK_HEADER_RE = re.compile(
-    r'^(?:[A-Za-z]{3})?\d{1,2}/\d{1,2}-'
-    r'(?:[A-Za-z]{3})?(?:\d{1,2}/)?\d{1,2}$'
+    r'^(?:[A-Za-z]{3})?(\d{1,2})/(\d{1,2})-'
+    r'(?:[A-Za-z]{3})?(?:(\d{1,2})/)?(\d{1,2})$'
 )
 
 
+def _to_24_hour(hour: int, ampm: str | None) -> int:
+    """Return ``hour`` on the 24 hour clock given an ``am``/``pm`` suffix."""
+    if ampm:
+        ampm = ampm[0].lower()
+        if ampm == 'p' and hour != 12:
+            hour += 12
+        if ampm == 'a' and hour == 12:
+            hour = 0
+    return hour
+
+
+# logs repeat a small set of time strings, so parsed values are memoized;
+# ``datetime.time`` is immutable and safe to share between callers
+@functools.lru_cache(maxsize=4096)
 def _parse_time(value: str) -> datetime.time | None:
     """Return ``datetime.time`` parsed from ``value`` or ``None`` on failure."""
 
@@ -82,28 +118,31 @@ def _parse_time(value: str) -> datetime.time | None:
     value = value.strip()
 
     try:
+        # fast path for the common bare ``h:mm``/``hh:mm`` form
+        if len(value) in (4, 5) and value[-3] == ':' and value[:-3].isdigit() and value[-2:].isdigit():
+            return datetime.time(int(value[:-3]) % 24, int(value[-2:]))
+
         m = _TIME_RE.match(value)
         if m:
             # Basic ``hh:mm`` with optional ``am``/``pm`` handling
-            hour = int(m.group(1))
+            hour = _to_24_hour(int(m.group(1)), m.group(3))
             minute = int(m.group(2) or 0)
-            ampm = m.group(3)
-            if ampm:
-                ampm = ampm.lower()
-                if ampm == 'pm' and hour != 12:
-                    hour += 12
-                if ampm == 'am' and hour == 12:
-                    hour = 0
             return datetime.time(hour % 24, minute)
 
-        # Fall back to ``pandas.to_datetime`` if regex parsing failed
-        t = pd.to_datetime(value).time()
-        return t
+        # Less common spellings such as ``10.30``, ``10:30 pm``, ``10:30p``
+        # or ``10:30:15``
+        m = _TIME_ALT_RE.match(value)
+        if m:
+            hour = _to_24_hour(int(m.group(1)), m.group(4))
+            return datetime.time(hour % 24, int(m.group(2)), int(m.group(3) or 0))
+        return None
     except Exception:
         # Any parsing failure results in ``None``
         return None
 
 
+# durations repeat as much as times do, and the results are plain floats
+@functools.lru_cache(maxsize=4096)
 def _parse_duration(value: str) -> float | None:
     """Return number of hours represented by ``value`` or ``None``."""
 
@@ -112,22 +151,35 @@ def _parse_duration(value: str) -> float | None:
 
     value = value.strip()
 
+    # plain numbers are the common case; none of them can end in am/pm, so
+    # trying them first doesn't change how times of day are interpreted
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = value.split(':')
+    # ``isdigit`` keeps out signs, underscores and spaces, which ``int`` would
+    # accept; ``int`` still rejects digits such as superscripts
+    if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+        try:
+            return int(parts[0]) + int(parts[1]) / 60
+        except ValueError:
+            pass
+
     # Interpret values containing ``am``/``pm`` as a time-of-day offset
     m = _TIME_RE.match(value)
     if m and m.group(3):  # has am/pm
         t = _parse_time(value)
         if t is not None:
             return t.hour + t.minute / 60
+    return None
 
-    parts = value.split(':')
-    if len(parts) == 2 and all(p.isdigit() for p in parts):
-        h, m = parts
-        return int(h) + int(m) / 60
 
-    try:
-        return float(value)
-    except ValueError:
-        return None
+def _to_minutes(times: List[datetime.time]) -> np.ndarray:
+    """Return minutes since midnight for each of ``times`` as an integer array."""
+    return np.fromiter((t.hour * 60 + t.minute for t in times), dtype=np.int64, count=len(times))
+
 
 def _avg_time(times: List[datetime.time]) -> datetime.time | None:
     """
@@ -159,17 +211,31 @@ def _avg_time(times: List[datetime.time]) -> datetime.time | None:
     if not times:
         return None
 
-    # 2 & 3. Build list of angles (radians) for each time
-    angles = []
-    for t in times:
-        total_minutes = t.hour * 60 + t.minute
-        # Scale minutes to fraction of full day (24*60), then to radians
-        angle = (total_minutes / (24 * 60)) * 2 * math.pi
-        angles.append(angle)
+    # 2. Total minutes since midnight
+    return _mean_time_from_minutes(_to_minutes(times))
+
+
+def _mean_time_from_minutes(minutes: np.ndarray) -> datetime.time | None:
+    """Return the circular mean of non-empty ``minutes``.
+
+    This is steps 3-9 of :func:`_avg_time`; the numbered comments below
+    follow its docstring.
+    """
+
+    # if they're all the same time (e.g. a single entry) that time is its own
+    # mean and the trig can be skipped
+    first = int(minutes[0])
+    if (minutes == first).all():
+        return datetime.time(first // 60, first % 60)
 
-    # 4. Sum up sine and cosine components
-    sin_sum = sum(math.sin(a) for a in angles)
-    cos_sum = sum(math.cos(a) for a in angles)
+    # 3. Scale minutes to fraction of full day (24*60), then to radians
+    angles = minutes / (24 * 60) * 2 * math.pi
+
+    # 4. Sum up sine and cosine components; ``math.fsum`` is correctly
+    # rounded, so a mean sitting on a half-minute boundary doesn't depend on
+    # the order NumPy or the running Python version would add them in
+    sin_sum = math.fsum(np.sin(angles))
+    cos_sum = math.fsum(np.cos(angles))
 
     # 5. If the resultant vector is zero, mean is undefined
     if sin_sum == 0 and cos_sum == 0:
@@ -209,10 +275,16 @@ def _median(values: List[float]) -> float | None:
 def _median_time(times: List[datetime.time]) -> datetime.time | None:
     """Return the median time from ``times``."""
 
-    minutes = [t.hour * 60 + t.minute for t in times if t is not None]
-    med = _median(minutes)
-    if med is None:
+    times = [t for t in times if t is not None]
+    if not times:
         return None
+    return _median_time_from_minutes(_to_minutes(times))
+
+
+def _median_time_from_minutes(minutes: np.ndarray) -> datetime.time:
+    """Return the median of non-empty ``minutes`` as a time of day."""
+
+    med = float(np.median(minutes))
     hour = int(med // 60) % 24
     minute = int(med % 60)
     return datetime.time(hour, minute)
@@ -233,8 +305,30 @@ def _std(values: List[float]) -> float | None:
 def _std_time(times: List[datetime.time]) -> float | None:
     """Return standard deviation in minutes of ``times``."""
 
-    minutes = [t.hour * 60 + t.minute for t in times if t is not None]
-    return _std(minutes)
+    times = [t for t in times if t is not None]
+    if not times:
+        return None
+    return _std_from_minutes(_to_minutes(times))
+
+
+def _std_from_minutes(minutes: np.ndarray) -> float:
+    """Return the standard deviation of non-empty ``minutes``."""
+
+    # the mean is the exact integer total divided once by the count, as
+    # ``sum(values) / len(values)`` gives for integer minutes; the squared
+    # deviations are then added with the correctly rounded ``math.fsum``, so
+    # the result can differ from ``_std`` in the last place
+    deviations = minutes - int(minutes.sum()) / minutes.size
+    return math.sqrt(math.fsum(deviations * deviations) / minutes.size)
+
+
+def _circular_offsets(minutes: np.ndarray, exp_minutes: int) -> np.ndarray:
+    """Return the distance of each of ``minutes`` from ``exp_minutes``.
+
+    Distances go whichever way round the clock is shorter, so they are at most
+    12 hours.
+    """
+    return np.abs((minutes - exp_minutes + 12 * 60) % (24 * 60) - 12 * 60)
 
 
 def _avg_offset(times: List[datetime.time], expected: datetime.time) -> float | None:
@@ -245,42 +339,54 @@ def _avg_offset(times: List[datetime.time], expected: datetime.time) -> float |
         return None
 
     exp_minutes = expected.hour * 60 + expected.minute
+    return float(_circular_offsets(_to_minutes(times), exp_minutes).mean())
 
-    def _circ_diff(m: int) -> int:
-        diff = abs(m - exp_minutes) % (24 * 60)
-        if diff > 12 * 60:
-            diff = 24 * 60 - diff
-        return diff
 
-    diffs = [_circ_diff(t.hour * 60 + t.minute) for t in times]
-    return sum(diffs) / len(diffs)
+def _time_stats(times: List[datetime.time], exp_minutes: int) -> dict[str, object]:
+    """Return the weekly statistics for non-empty ``times`` of one column.
+
+    The times are converted to minutes once and every statistic, including
+    those of the offsets from ``exp_minutes``, is computed from that array.
+    """
+    minutes = _to_minutes(times)
+    offsets: list[int] = _circular_offsets(minutes, exp_minutes).tolist()
+    return {
+        'avg': _mean_time_from_minutes(minutes),
+        'median': _median_time_from_minutes(minutes),
+        'std': _std_from_minutes(minutes),
+        'offset_avg': sum(offsets) / len(offsets),
+        'offset_median': _median(offsets),
+        'offset_std': _std(offsets),
+    }
 
 
 def _parse_week_header(line: str) -> tuple[str, List[datetime.date]] | None:
     """Parse a week header line.
 
     The log sometimes prefixes the month/day pairs with a day-of-week, e.g.
-    ``"Fri4/25-Wed4/30"``.  The previous implementation expected the day of
-    week to be absent which caused a failure to match and resulted in an empty
-    dataframe.  This version extracts all numbers from the line and interprets
-    them as month/day pairs.
+    ``"Fri4/25-Wed4/30"``, and may omit the month of the end date. Returns
+    ``None`` when ``line`` isn't a header matching ``_WEEK_HEADER_RE``.
     """
 
-    line = line.strip()
-    nums: list[int] = [int(n) for n in re.findall(r"\d+", line)]
-    if len(nums) < 3:
+    m = _WEEK_HEADER_RE.match(line.strip())
+    if not m:
         return None
+    return _week_from_header_match(m)
+
+
+def _week_from_header_match(m: re.Match) -> tuple[str, List[datetime.date]]:
+    """Return the label and days of a header matched by ``_WEEK_HEADER_RE``.
+
+    ``parse_log`` and ``export_single_weeks_csv`` already hold the match, so
+    they call this directly rather than :func:`_parse_week_header`.
+    """
+    sm = int(m[1])
+    em = int(m[3]) if m[3] else sm
+    return _week_range(sm, int(m[2]), em, int(m[4]))
 
-    sm: int
-    sd: int
-    em: int
-    ed: int
-    sm, sd = nums[0], nums[1]
-    if len(nums) >= 4:
-        em, ed = nums[2], nums[3]
-    else:
-        em, ed = sm, nums[2]
 
+def _week_range(sm: int, sd: int, em: int, ed: int) -> tuple[str, List[datetime.date]]:
+    """Return the label and list of days from ``sm``/``sd`` to ``em``/``ed``."""
     year: int = 2025
     start: datetime.date = datetime.date(year, sm, sd)
     end: datetime.date = datetime.date(year, em, ed)
@@ -297,101 +403,170 @@ def _parse_week_header(line: str) -> tuple[str, List[datetime.date]] | None:
     return label, days
 
 
-def parse_log(path: str) -> pd.DataFrame:
-    """Parse a sleep log text file and return a dataframe of daily records."""
+def _indent_width(line: str) -> int:
+    """Return the indent of ``line`` in spaces, counting a tab as four."""
+    # most lines have no tabs, so skip building the expanded copy for them
+    expanded = line.replace('\t', '    ') if '\t' in line else line
+    return len(expanded) - len(expanded.lstrip(' '))
+
+
+def _parse_string_value(value: str) -> str | None:
+    """Return a free-text log ``value``, with ``'.'`` meaning no answer."""
+    return None if value == '.' else value
+
+
+def _parse_drinks_value(value: str) -> float:
+    """Return the number of drinks in ``value``, with ``'.'`` meaning none."""
+    return float(value) if value != '.' else 0.0
+
+
+# The converter ``parse_log`` applies to every value of each column, looked up
+# once per question line so the values need no per-value type checks.
+# ``_parse_duration`` already falls back to ``float`` for plain numbers.
+_COL_PARSER = {
+    col: (
+        _parse_time if col in TIME_COLS
+        else _parse_string_value if col in STRING_COLS
+        else _parse_drinks_value if col == 'alcohol_drinks'
+        else _parse_duration
+    )
+    for col in QUESTION_TO_COLUMN.values()
+}
+
+
+def _flush_week(
+    columns: dict[str, list],
+    week_label: str,
+    week_days: List[datetime.date],
+    week_data: dict[str, list],
+) -> None:
+    """Append one row per day of a parsed week block to ``columns``.
+
+    Cells with no value are filled with ``NaN``, as ``pd.DataFrame`` does for
+    keys missing from a list of records.
+    """
+    n_before = len(columns.get('date', ()))
+    n_days = len(week_days)
+    columns.setdefault('date', []).extend(week_days)
+    columns.setdefault('week_label', []).extend([week_label] * n_days)
+    for col, values in week_data.items():
+        if not values:
+            # a question left blank adds no cells, so it neither creates its
+            # column nor moves it ahead of columns from later rows
+            continue
+        cells = columns.setdefault(col, [math.nan] * n_before)
+        cells.extend(values[:n_days])
+    for cells in columns.values():
+        # pad columns this week had no (or too few) values for
+        if len(cells) < n_before + n_days:
+            cells.extend([math.nan] * (n_before + n_days - len(cells)))
+
+
+def _cache_dir() -> str:
+    """Return the directory used for cached parse results."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'sleep_analysis')
+
+
+def parse_log(path: str, use_cache: bool = False) -> pd.DataFrame:
+    """Parse a sleep log text file and return a dataframe of daily records.
+
+    When ``use_cache`` is ``True`` the result is pickled under
+    :func:`_cache_dir` and reused while the log file is unchanged. Each log
+    path has a single entry, stored together with the log's size and
+    modification time and this module's modification time; if any of them
+    differ, or the entry can't be read, the log is parsed again and the entry
+    replaced.
+    """
+    if not use_cache:
+        return _parse_log(path)
+
+    abs_path = os.path.abspath(path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size, os.stat(__file__).st_mtime_ns)
+    key = hashlib.blake2b(abs_path.encode(), digest_size=16).hexdigest()
+    cache_path = os.path.join(_cache_dir(), f'{key}.pkl')
+
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_stamp, cached_df = pickle.load(f)
+        if cached_stamp == stamp:
+            return cached_df
+    except Exception:
+        # a missing, stale-format or corrupt entry just means parsing again
+        pass
+
+    df = _parse_log(path)
+    try:
+        # write to a temporary name first so an interrupted run can't leave a
+        # truncated entry behind
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((stamp, df), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # caching is best-effort; an unwritable cache dir shouldn't fail the run
+        pass
+    return df
 
-    with open(path, 'r', encoding='utf-8') as f:
-        lines: list[str] = f.readlines()
 
-    # ``records`` accumulates a dictionary per day which becomes our dataframe
-    records: list[dict] = []
+def _parse_log(path: str) -> pd.DataFrame:
+    """Parse ``path`` without consulting the cache; see :func:`parse_log`."""
+
+    # ``columns`` accumulates one list per column which becomes our dataframe
+    columns: dict[str, list] = {}
 
     # tracking variables for the current week block
     week_label: str | None = None
     week_days: list[datetime.date] = []
     week_data: dict[str, list] = {}
 
-    # iterate over every line in the log
-    for raw_line in lines:
-        line = raw_line.rstrip('\n')
-
-        if not line.strip() or line.strip().startswith('...'):
-            # skip blank lines and divider rows
-            continue
+    with open(path, 'r', encoding='utf-8') as f:
+        # iterate over every line in the log, reading it as we go rather than
+        # loading the whole file up front
+        for line in f:
+            stripped = line.strip()
+            if not stripped or stripped.startswith('...'):
+                # skip blank lines and divider rows
+                continue
 
-        expanded = line.replace('\t', '    ')
-        indent = len(expanded) - len(expanded.lstrip(' '))
-        stripped = line.strip()
-
-        if _WEEK_HEADER_RE.match(stripped):  # week header
-            if week_label and week_days:
-                # flush the previous week's accumulated data
-                for i, day in enumerate(week_days):
-                    record: dict[str, object] = {'date': day, 'week_label': week_label}
-                    for q, values in week_data.items():
-                        if i < len(values):
-                            record[q] = values[i]
-                    records.append(record)
-                week_data = {}
-
-            res = _parse_week_header(stripped)
-            if res:
-                week_label, week_days = res
+            # cheap substring checks first: a header always contains '/' and a
+            # question always ends in '?', so most note lines skip both regexes
+            header = _WEEK_HEADER_RE.match(stripped) if '/' in stripped else None
+            if header:  # week header
+                if week_label and week_days:
+                    # flush the previous week's accumulated data
+                    _flush_week(columns, week_label, week_days, week_data)
+                    week_data = {}
+
+                week_label, week_days = _week_from_header_match(header)
+            elif week_label and '?' in stripped and _indent_width(line) >= 4:
+                m = _QUESTION_RE.match(stripped)
+                if m:
+                    # question line containing data for the current week
+                    values: list[str] = m.group(2).split()
+                    col = QUESTION_TO_COLUMN.get(m.group(1))
+                    if col:
+                        # parse each value for the question column
+                        parse = _COL_PARSER[col]
+                        parsed_vals: list = [parse(v) for v in values]
+                        week_data.setdefault(col, parsed_vals)
             else:
-                week_label = None
-                week_days = []
-        elif indent >= 4 and week_label:
-            if '?' in stripped:
-                # question line containing data for the current week
-                q_part, values_part = stripped.split('?', 1)
-                question = (q_part + '?').strip()
-                values: list[str] = values_part.strip().split()
-                col = QUESTION_TO_COLUMN.get(question)
-                parsed_vals: list = []
-
-                # parse each value for the question column
-                for v in values:
-                    if col in TIME_COLS:
-                        parsed_vals.append(_parse_time(v))
-                    elif col in STRING_COLS:
-                        parsed_vals.append(None if v == '.' else v)
-                    elif col == 'alcohol_drinks':
-                        parsed_vals.append(float(v) if v != '.' else 0.0)
-                    else:
-                        val = _parse_duration(v)
-                        if val is None:
-                            try:
-                                val = float(v)
-                            except ValueError:
-                                val = None
-                        parsed_vals.append(val)
-                if col:
-                    week_data.setdefault(col, parsed_vals)
-        else:
-            # deeper indents are notes -> ignore
-            continue
+                # deeper indents are notes -> ignore
+                continue
 
     if week_label and week_days:
         # flush the final week after processing all lines
-        for i, day in enumerate(week_days):
-            record: dict[str, object] = {'date': day, 'week_label': week_label}
-            for q, values in week_data.items():
-                if i < len(values):
-                    record[q] = values[i]
-            records.append(record)
+        _flush_week(columns, week_label, week_days, week_data)
 
-    df = pd.DataFrame(records)
+    df = pd.DataFrame(columns)
 
     # Detect duplicate dates which would indicate a parsing bug in the log
     if len(df):
-        seen: set[datetime.date] = set()
-        dup_set: set[datetime.date] = set()
-        for d in df['date']:
-            if d in seen:
-                dup_set.add(d)
-            else:
-                seen.add(d)
-        if dup_set:
+        dup_mask = df['date'].duplicated()
+        if dup_mask.any():
+            dup_set: set[datetime.date] = set(df['date'][dup_mask])
             raise ValueError(
                 f"Duplicate dates found in log: {sorted(dup_set)}"
             )
@@ -399,6 +574,11 @@ def parse_log(path: str) -> pd.DataFrame:
     return df
 
 
+def _is_missing(value: object) -> bool:
+    """Return ``True`` for ``None`` and ``NaN`` cell values."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
 def compute_weekly_stats(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
     """Return per-week statistics grouped by ``week_label``."""
 
@@ -406,39 +586,47 @@ def compute_weekly_stats(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
     if df.empty or 'week_label' not in df.columns:
         return weekly_dfs
 
-    # iterate over each week block in the dataframe
-    for label, wk_df in df.groupby('week_label'):
+    # pull every column out of the dataframe once and collect each week's row
+    # positions, rather than materialising a sub-dataframe per week and
+    # re-extracting its columns
+    week_rows: dict[str, list[int]] = {}
+    for i, label in enumerate(df['week_label'].tolist()):
+        if not _is_missing(label):
+            week_rows.setdefault(label, []).append(i)
+    columns = set(df.columns)
+    col_values: dict[str, list] = {
+        col: df[col].tolist() for col in [*TIME_COLS, *NUMERIC_COLS] if col in columns
+    }
+
+    def _week_values(col: str, rows: list[int]) -> list:
+        values = col_values.get(col)
+        if values is None:
+            return []
+        return [values[i] for i in rows if not _is_missing(values[i])]
+
+    # iterate over each week block, in the same label order as ``groupby``
+    for label in sorted(week_rows):
+        rows = week_rows[label]
         stats: dict[str, list] = {}
 
         # total number of alcoholic drinks for the week
-        stats['total_drinks'] = [wk_df.get('alcohol_drinks', pd.Series(dtype=float)).fillna(0).sum()]
+        stats['total_drinks'] = [sum(_week_values('alcohol_drinks', rows), 0.0)]
 
         for col in TIME_COLS:
-            times: list[datetime.time] = wk_df[col].dropna().tolist() if col in wk_df else []
-            avg_t: datetime.time | None = _avg_time(times) if times else None
-            med_t: datetime.time | None = _median_time(times) if times else None
-            std_t = _std_time(times) if times else None
+            times: list[datetime.time] = _week_values(col, rows)
+            st: dict[str, object] = _time_stats(times, _EXPECTED_MINUTES[col]) if times else {}
+            avg_t: datetime.time | None = st.get('avg')
+            med_t: datetime.time | None = st.get('median')
 
             stats[f'{col}_avg'] = [avg_t.strftime('%I:%M%p').lower() if avg_t else None]
             stats[f'{col}_median'] = [med_t.strftime('%I:%M%p').lower() if med_t else None]
-            stats[f'{col}_std'] = [std_t]
-
-            offsets: list[int] = []
-            if times:
-                for t in times:
-                    diff = abs((t.hour * 60 + t.minute) - (EXPECTED_TIMES[col].hour * 60 + EXPECTED_TIMES[col].minute)) % (24 * 60)
-                    if diff > 12 * 60:
-                        diff = 24 * 60 - diff
-                    offsets.append(diff)
-            avg_off: float | None = sum(offsets) / len(offsets) if offsets else None
-            med_off = _median(offsets) if offsets else None
-            std_off = _std(offsets) if offsets else None
-            stats[f'{col}_offset_avg'] = [avg_off]
-            stats[f'{col}_offset_median'] = [med_off]
-            stats[f'{col}_offset_std'] = [std_off]
+            stats[f'{col}_std'] = [st.get('std')]
+            stats[f'{col}_offset_avg'] = [st.get('offset_avg')]
+            stats[f'{col}_offset_median'] = [st.get('offset_median')]
+            stats[f'{col}_offset_std'] = [st.get('offset_std')]
 
         for col in NUMERIC_COLS:
-            vals: list[float] = wk_df[col].dropna().tolist() if col in wk_df else []
+            vals: list[float] = _week_values(col, rows)
             avg_val: float | None = sum(vals) / len(vals) if vals else None
             med_val = _median(vals) if vals else None
             std_val = _std(vals) if vals else None
@@ -458,7 +646,9 @@ def _filter_non_empty_frames(frames: Iterable[pd.DataFrame]) -> list[pd.DataFram
     valid: list[pd.DataFrame] = []
     for df in frames:
         try:
-            empty_df = df.dropna(how="all").empty
+            # every cell missing; checked on the mask rather than by building
+            # a ``dropna`` copy of the frame
+            empty_df = df.empty or bool(df.isna().values.all())
         except Exception:
             empty_df = df.empty or all(
                 all(val is None for val in df[col]) for col in df.columns
@@ -493,19 +683,19 @@ def compute_overall_stats(weekly_stats: Dict[str, pd.DataFrame]) -> pd.DataFrame
     overall: dict[str, float | str] = {}
 
     for col in numeric_cols:
-        values: list[float] = [v for v in combined[col] if v is not None]
-        mean_val: float | None = sum(values) / len(values) if values else None
+        values = combined[col].to_numpy(dtype=float)
+        mean_val: float | None = math.fsum(values) / values.size if values.size else None
         overall[col] = mean_val
 
     if 'total_drinks' in combined.columns:
         vals = [v for v in combined['total_drinks'] if v is not None]
         overall['total_drinks_median'] = _median(vals) if vals else None
 
-    # time columns
+    # time columns; the weekly strings are parsed back with the memoized
+    # ``_parse_time`` rather than a ``pd.to_datetime`` call per cell
     for col in time_cols:
-        times: list[datetime.time] = [
-            pd.to_datetime(t).time() for t in combined[col] if isinstance(t, str)
-        ]
+        parsed = (_parse_time(t) for t in combined[col] if isinstance(t, str))
+        times: list[datetime.time] = [t for t in parsed if t is not None]
         if times:
             avg_t: datetime.time | None = _avg_time(times)
             if avg_t:
@@ -514,41 +704,81 @@ def compute_overall_stats(weekly_stats: Dict[str, pd.DataFrame]) -> pd.DataFrame
     return pd.DataFrame([overall])
 
 
-def _prepare_stats_for_output(df: pd.DataFrame, label_col: str | None = None) -> pd.DataFrame:
-    """Return ``df`` in vertical layout with rounded numeric values."""
+def _round_stat(v: object) -> object:
+    """Round float ``v`` to three significant digits; return other values as-is."""
+    if isinstance(v, float):
+        try:
+            return float(f"{v:.3g}")
+        except Exception:
+            return v
+    return v
+
+
+def _write_tsv(df: pd.DataFrame, path: str, columns: list[str] | None = None) -> None:
+    """Write ``df`` to ``path`` as a tab-separated file without the index.
+
+    ``columns`` limits the output to a subset of columns without copying ``df``.
+    """
+    df.to_csv(path, sep='\t', index=False, lineterminator="\n", columns=columns)
+
+
+def _stat_cell(v: object) -> object:
+    """Return stats value ``v`` rounded and ready for ``csv.writer``."""
+    v = _round_stat(v)
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return ''
+    return v
+
+
+def _write_stats_tsv(df: pd.DataFrame, path: str, label_col: str | None = None) -> None:
+    """Write stats ``df`` to ``path`` in vertical layout with rounded values.
+
+    Each column becomes a ``stat``/``value`` row, prefixed with its row's
+    ``label_col`` value when given. Rows are written as they are generated
+    rather than first being collected into an intermediate dataframe.
+    """
     if df.empty:
-        return df
-
-    def _round(v: object) -> object:
-        if isinstance(v, float):
-            try:
-                return float(f"{v:.3g}")
-            except Exception:
-                return v
-        return v
-
-    if label_col and label_col in df.columns:
-        rows = []
-        for _, r in df.iterrows():
-            label = r[label_col]
-            for col in df.columns:
-                if col == label_col:
-                    continue
-                rows.append({label_col: label, 'stat': col, 'value': _round(r[col])})
-        return pd.DataFrame(rows)
-
-    out = {'stat': [], 'value': []}
-    row = df.iloc[0]
-    for col in df.columns:
-        out['stat'].append(col)
-        out['value'].append(_round(row[col]))
-    return pd.DataFrame(out)
+        _write_tsv(df, path)
+        return
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        if label_col and label_col in df.columns:
+            writer.writerow([label_col, 'stat', 'value'])
+            label_idx = df.columns.get_loc(label_col)
+            for r in df.itertuples(index=False, name=None):
+                label = r[label_idx]
+                writer.writerows(
+                    [label, col, _stat_cell(v)] for i, (col, v) in enumerate(zip(df.columns, r)) if i != label_idx
+                )
+        else:
+            writer.writerow(['stat', 'value'])
+            row = df.iloc[0]
+            writer.writerows([col, _stat_cell(row[col])] for col in df.columns)
 
 
+def _write_labelled_stats_tsv(frames: Dict[str, pd.DataFrame], path: str, label_col: str) -> None:
+    """Write single-row stats ``frames`` to ``path``, one block per label.
+
+    Each frame is read on its own, so a value keeps the type it has in its own
+    week instead of being upcast by a concatenation with the other weeks.
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow([label_col, 'stat', 'value'])
+        for label, wk_df in frames.items():
+            row = wk_df.iloc[0]
+            writer.writerows([label, col, _stat_cell(row[col])] for col in wk_df.columns)
+
 
 def _format_range(start: datetime.date, end: datetime.date) -> str:
     """Return date range label like '2025--01-01--01-07'."""
-    return f"{start.year:04d}--{start:%m-%d}--{end:%m-%d}"
+    return f"{start.year:04d}--{start.month:02d}-{start.day:02d}--{end.month:02d}-{end.day:02d}"
+
+
+def _format_clock_time(t: datetime.time) -> str:
+    """Return ``t`` on the 12 hour clock without a leading zero, e.g. ``'9:05 PM'``."""
+    return f"{t.hour % 12 or 12}:{t.minute:02d} {'AM' if t.hour < 12 else 'PM'}"
 
 
 def _format_raw_value(value: str) -> str:
@@ -559,54 +789,44 @@ def _format_raw_value(value: str) -> str:
     if '|' not in value and value.lower().endswith(('am', 'pm')):
         t = _parse_time(value)
         if t is not None:
-            formatted = datetime.datetime.combine(datetime.date(1900, 1, 1), t).strftime('%I:%M %p')
-            return formatted.lstrip('0')  # Remove leading zero from hour
+            return _format_clock_time(t)
     return value
 
 
 def export_single_weeks_csv(logfile: str, output_dir: str) -> None:
     """Write per-week CSVs of raw log values extracted from ``logfile``."""
-    with open(logfile, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
     week_label = None
     week_days: List[datetime.date] = []
     week_data: Dict[str, List[str]] = {}
     week_lines: list[str] = []
 
-    for raw_line in lines:
-        line = raw_line.rstrip('\n')
-        if not line.strip() or line.strip().startswith('...'):
-            continue
+    with open(logfile, 'r', encoding='utf-8') as f:
+        for raw_line in f:
+            stripped = raw_line.strip()
+            if not stripped or stripped.startswith('...'):
+                continue
 
-        expanded = line.replace('\t', '    ')
-        indent = len(expanded) - len(expanded.lstrip(' '))
-        stripped = line.strip()
-
-        if _WEEK_HEADER_RE.match(stripped):
-            if week_label and week_days:
-                _write_week_csv(output_dir, week_days, week_data, "".join(week_lines))
-                week_data = {}
-                week_lines = []
-            res = _parse_week_header(stripped)
-            if res:
-                week_label, week_days = res
+            header = _WEEK_HEADER_RE.match(stripped) if '/' in stripped else None
+            if header:
+                if week_label and week_days:
+                    _write_week_csv(output_dir, week_days, week_data, "".join(week_lines))
+                    week_data = {}
+                week_label, week_days = _week_from_header_match(header)
                 week_lines = [raw_line]
-            else:
-                week_label = None
-                week_days = []
-                week_lines = []
-        elif indent >= 4 and week_label:
-            if '?' in stripped:
-                q_part, values_part = stripped.split('?', 1)
-                question = (q_part + '?').strip()
-                values = values_part.strip().split()
-                week_data[question] = values
-                week_lines.append(' ' * indent + question + '\n')
-            else:
+                continue
+
+            indent = _indent_width(raw_line)
+            if indent >= 4 and week_label:
+                if '?' in stripped:
+                    q_part, values_part = stripped.split('?', 1)
+                    question = (q_part + '?').strip()
+                    values = values_part.split()
+                    week_data[question] = values
+                    week_lines.append(' ' * indent + question + '\n')
+                else:
+                    week_lines.append(raw_line)
+            elif week_label:
                 week_lines.append(raw_line)
-        elif week_label:
-            week_lines.append(raw_line)
 
     if week_label and week_days:
         _write_week_csv(output_dir, week_days, week_data, "".join(week_lines))
@@ -631,16 +851,18 @@ def save_week_log_annotations_as_markdown(
     where YYYY is the current year, MM-DD is taken from the header's date range,
     and if the second date omits the month, it inherits the first month's value.
     """
-    lines = log_text.splitlines()
-    if not lines:
+    # iterate over the text line by line rather than splitting it into a list
+    lines = io.StringIO(log_text)
+    first_line = next(lines, None)
+    if first_line is None:
         raise ValueError("Empty log text provided")
 
-    header = lines[0].strip()
+    header = first_line.strip()
     if not _WEEK_HEADER_RE.match(header):
         raise ValueError(f"Header '{header}' does not match expected week header pattern")
 
     # Parse the month/day pairs from the header
-    m = re.search(r"(\d{1,2})/(\d{1,2})-(?:[A-Za-z]{3})?(?:(\d{1,2})/)?(\d{1,2})", header)
+    m = _HEADER_DATES_RE.search(header)
     if not m:
         raise ValueError(f"Could not parse dates from header '{header}'")
     month1, day1, month2, day2 = m.group(1), m.group(2), m.group(3), m.group(4)
@@ -661,14 +883,14 @@ def save_week_log_annotations_as_markdown(
     annotations = {}
     current_question = None
     question_indent = None
-    question_re = re.compile(r'^\s*\d+(?:\.\d+)*[a-z]?\.\s')
 
-    for line in lines[1:]:
+    for line in lines:
+        line = line.rstrip('\r\n')
         if not line.strip():
             continue
         indent = len(line) - len(line.lstrip(' '))
         # Detection of a question line
-        if question_re.match(line):
+        if _QUESTION_NUM_RE.match(line):
             current_question = line.strip()
             question_indent = indent
             annotations[current_question] = []
@@ -711,15 +933,16 @@ def _write_week_csv(
     label = _format_range(start, end)
     path = os.path.join(output_dir, f'data-with-questions-{label}.csv')
     header = [''] + [f'{d.month}/{d.day}' for d in days]
+    n_days = len(days)
+    # one cell per day: extra values are dropped, missing ones left empty
+    rows = [
+        [question, *map(_format_raw_value, values[:n_days]), *[''] * (n_days - len(values))]
+        for question, values in data.items()
+    ]
     with open(path, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f, lineterminator='\n')
         writer.writerow(header)
-        for question, values in data.items():
-            row = [question]
-            for i in range(len(days)):
-                val = values[i] if i < len(values) else ''
-                row.append(_format_raw_value(val))
-            writer.writerow(row)
+        writer.writerows(rows)
 
     # Save annotations for this week
     save_week_log_annotations_as_markdown(week_text, output_dir)
@@ -731,12 +954,10 @@ def _write_week_csv_from_df(
     """Write a table similar to ``_write_week_csv`` using dataframe values."""
 
     os.makedirs(output_dir, exist_ok=True)
-    rows = [
-        {col: df[col].iloc[i] if i < len(df[col]) else None for col in df.columns}
-        for i in range(len(df['date']))
-    ]
-    rows.sort(key=lambda r: r['date'])
-    days = [r['date'] for r in rows]
+    # sort the rows by date in pandas and read each column out as a list,
+    # rather than building and sorting a dict per row
+    df = df.sort_values('date', kind='stable')
+    days = df['date'].tolist()
     header = [''] + [f'{d.month}/{d.day}' for d in days]
     path = os.path.join(output_dir, f'data-with-questions-{label}.{ext}')
     with open(path, 'w', encoding='utf-8', newline='') as f:
@@ -745,10 +966,9 @@ def _write_week_csv_from_df(
         for col in [c for c in df.columns if c != 'date']:
             question = COLUMN_TO_QUESTION.get(col, col)
             row = [question]
-            for r in rows:
-                val = r.get(col)
+            for val in df[col].tolist():
                 if isinstance(val, datetime.time):
-                    text = datetime.datetime.combine(datetime.date(1900, 1, 1), val).strftime('%I:%M %p').lstrip('0')
+                    text = _format_clock_time(val)
                 elif val is None:
                     text = ''
                 else:
@@ -757,51 +977,60 @@ def _write_week_csv_from_df(
             writer.writerow(row)
 
 
-def export_weeks_from_dataframe(df: pd.DataFrame, label_col: str, output_dir: str) -> None:
-    """Export per-week CSVs, TSVs and stats using ``label_col`` for grouping."""
+def export_weeks_from_dataframe(
+    df: pd.DataFrame, label_col: str, output_dir: str, stats_path: str | None = None
+) -> None:
+    """Export per-week CSVs, TSVs and stats using ``label_col`` for grouping.
+
+    The combined stats table is written to ``stats_path`` if given, otherwise
+    to ``stats-by-{label_col}.tsv`` inside ``output_dir``.
+    """
 
     os.makedirs(output_dir, exist_ok=True)
 
-    df_stats = df.copy()
+    # shallow copy: only the swapped-in label column is new, the rest share
+    # their data with ``df``
+    df_stats = df.copy(deep=False)
     df_stats['week_label'] = df[label_col]
     weekly_stats = compute_weekly_stats(df_stats)
 
-    combined_rows = []
+    # the stats tables are small, so write them with the plain csv writer
+    # rather than paying ``to_csv`` setup for every week
     for label, wk_df in weekly_stats.items():
-        out_df = _prepare_stats_for_output(wk_df)
-        out_df.to_csv(os.path.join(output_dir, f'stats-{label}.tsv'), sep='\t', index=False, lineterminator="\n")
-        out_df.insert(0, label_col, label)
-        combined_rows.append(out_df)
+        _write_stats_tsv(wk_df, os.path.join(output_dir, f'stats-{label}.tsv'))
 
-    for label, group in df.groupby(label_col):
-        group.to_csv(os.path.join(output_dir, f'data-{label}.tsv'), sep='\t', index=False, lineterminator="\n")
+    for label, group in df.groupby(label_col, observed=True):
+        _write_tsv(group, os.path.join(output_dir, f'data-{label}.tsv'))
         _write_week_csv_from_df(group, output_dir, label)
 
-    if combined_rows:
-        combined = pd.concat(combined_rows, ignore_index=True)
-        combined.to_csv(os.path.join(output_dir, f'stats-by-{label_col}.tsv'), sep='\t', index=False)
+    if weekly_stats:
+        if stats_path is None:
+            stats_path = os.path.join(output_dir, f'stats-by-{label_col}.tsv')
+        _write_labelled_stats_tsv(weekly_stats, stats_path, label_col)
 
 
-def export_questions_table(df: pd.DataFrame, path: str) -> None:
-    """Write ``df`` to ``path`` in the same question-oriented layout."""
+def export_questions_table(df: pd.DataFrame, path: str, columns: list[str] | None = None) -> None:
+    """Write ``df`` to ``path`` in the same question-oriented layout.
 
-    rows = [
-        {col: df[col].iloc[i] if i < len(df[col]) else None for col in df.columns}
-        for i in range(len(df['date']))
-    ]
-    rows.sort(key=lambda r: r['date'])
-    days = [r['date'] for r in rows]
+    Only ``columns`` are included when given; otherwise every column is.
+    """
+    if columns is None:
+        columns = list(df.columns)
+
+    # as in ``_write_week_csv_from_df``, sort once in pandas and read each
+    # column out as a list instead of indexing cell by cell
+    df = df.sort_values('date', kind='stable')
+    days = df['date'].tolist()
     header = [''] + [f"{d.month}/{d.day}" for d in days]
     with open(path, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f, lineterminator='\n', delimiter='\t')
         writer.writerow(header)
-        for col in [c for c in df.columns if c != 'date']:
+        for col in [c for c in columns if c != 'date']:
             question = COLUMN_TO_QUESTION.get(col, col)
             row = [question]
-            for r in rows:
-                val = r.get(col)
+            for val in df[col].tolist():
                 if isinstance(val, datetime.time):
-                    text = datetime.datetime.combine(datetime.date(1900, 1, 1), val).strftime('%I:%M %p').lstrip('0')
+                    text = _format_clock_time(val)
                 elif val is None:
                     text = ''
                 else:
@@ -0,0 +1,178 @@
+"""Minimal pandas stub used when the real package isn't available."""
+import datetime
+import types
+
+
+class _Series(list):
+    def __init__(self, data=None, dtype=None):
+        if data is None:
+            data = []
+        super().__init__(data)
+    def notna(self):
+        return _Series([x is not None for x in self])
+
+    def dropna(self):
+        return _Series([x for x in self if x is not None])
+
+    def fillna(self, value):
+        return _Series([value if x is None else x for x in self])
+
+    def sum(self):
+        return sum(x for x in self if x is not None)
+
+    def tolist(self):
+        return list(self)
+
+    def to_numpy(self, dtype=None):
+        import numpy as np
+        return np.array(self, dtype=dtype)
+
+    def mean(self):
+        vals = [x for x in self if x is not None]
+        return sum(vals) / len(vals) if vals else 0
+
+    def all(self):
+        return all(self)
+
+    def any(self):
+        return any(self)
+
+    def duplicated(self):
+        seen = set()
+        out = []
+        for x in self:
+            out.append(x in seen)
+            seen.add(x)
+        return _Series(out)
+
+    def __getitem__(self, key):
+        if isinstance(key, list) and len(key) == len(self) and all(isinstance(k, bool) for k in key):
+            return _Series([x for x, keep in zip(self, key) if keep])
+        return super().__getitem__(key)
+
+    @property
+    def iloc(self):
+        class _ILoc:
+            def __init__(self, data):
+                self.data = data
+
+            def __getitem__(self, idx):
+                return self.data[idx]
+
+        return _ILoc(self)
+
+    @property
+    def dtype(self):
+        for x in self:
+            if isinstance(x, (int, float)):
+                return float
+            if x is not None:
+                return object
+        return object
+
+
+class _DataFrame:
+    """Column-oriented stand-in: one list per column, all of equal length."""
+
+    def __init__(self, data):
+        self._cols = {}
+        self._nrows = 0
+        if isinstance(data, dict):
+            self._nrows = max((len(v) for v in data.values()), default=0)
+            if self._nrows:
+                for k, v in data.items():
+                    v = list(v)
+                    self._cols[k] = v + [None] * (self._nrows - len(v))
+        elif isinstance(data, list):
+            # records: columns in order of first appearance, missing cells None
+            self._nrows = len(data)
+            for i, row in enumerate(data):
+                for k, v in row.items():
+                    if k not in self._cols:
+                        self._cols[k] = [None] * self._nrows
+                    self._cols[k][i] = v
+
+    def __len__(self):
+        return self._nrows
+
+    def __contains__(self, key):
+        return key in self._cols
+
+    def __getitem__(self, key):
+        return _Series(self._cols.get(key, [None] * self._nrows))
+
+    def get(self, key, default):
+        return self[key] if key in self else default
+
+    @property
+    def empty(self):
+        return self._nrows == 0
+
+    @property
+    def columns(self):
+        return list(self._cols)
+
+    def _take(self, indices):
+        return _DataFrame({k: [v[i] for i in indices] for k, v in self._cols.items()})
+
+    def groupby(self, key, observed=None):
+        groups = {}
+        for i, k in enumerate(self[key]):
+            groups.setdefault(k, []).append(i)
+        for k, indices in groups.items():
+            yield k, self._take(indices)
+
+    def select_dtypes(self, include=None):
+        if include and (include == 'number' or include == ['number']):
+            numeric = [
+                col for col, values in self._cols.items()
+                if all(isinstance(v, (int, float, type(None))) for v in values)
+            ]
+
+            class _Cols(list):
+                @property
+                def columns(self):
+                    return self
+
+            return _Cols(numeric)
+        return []
+
+    def to_csv(self, path, sep=',', index=True):
+        cols = self.columns
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(sep.join(cols) + '\n')
+            for row in zip(*self._cols.values()):
+                f.write(sep.join('' if v is None else str(v) for v in row) + '\n')
+
+
+def _concat(dfs, ignore_index=True):
+    dfs = list(dfs)
+    cols = {}
+    for df in dfs:
+        for k in df.columns:
+            cols.setdefault(k, [])
+    for df in dfs:
+        for k, v in cols.items():
+            v.extend(df[k])
+    return _DataFrame(cols)
+
+
+def _to_datetime(val):
+    if isinstance(val, datetime.time):
+        return datetime.datetime.combine(datetime.date.today(), val)
+    for fmt in ("%H:%M", "%I:%M%p", "%H:%M:%S"):
+        try:
+            return datetime.datetime.strptime(str(val), fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised time format: {val}")
+
+
+def build_module() -> types.ModuleType:
+    """Return a ``pandas`` stand-in module backed by the classes above."""
+    pd_stub = types.ModuleType("pandas")
+    pd_stub.DataFrame = _DataFrame
+    pd_stub.Series = _Series
+    pd_stub.concat = _concat
+    pd_stub.to_datetime = _to_datetime
+    return pd_stub
@@ -0,0 +1,18 @@
+"""Shared pytest configuration."""
+import os
+import sys
+
+# Ensure the project root is on the import path so ``sleep_analysis`` (and the
+# ``tests`` package) can be imported however pytest is invoked.
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Only fall back to the pandas stub when pandas can't be imported, so the tests
+# run against the real package whenever it is installed.
+try:
+    import pandas  # noqa: F401
+except ImportError:
+    from tests._pandas_stub import build_module
+
+    sys.modules["pandas"] = build_module()
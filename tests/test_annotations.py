@@ -1,11 +1,4 @@
 import os
-import sys
-
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-if ROOT not in sys.path:
-    sys.path.insert(0, ROOT)
-
-import tests.test_log_parser  # ensure pandas stub is available
 
 from sleep_analysis.log_parser import export_single_weeks_csv
 
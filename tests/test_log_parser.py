@@ -1,162 +1,9 @@
-import unittest
-import sys
-import types
 import datetime
-import os
-
-"""Minimal pandas stub used when the real package isn't available."""
-
-class _Series(list):
-    def __init__(self, data=None, dtype=None):
-        if data is None:
-            data = []
-        super().__init__(data)
-    def notna(self):
-        return _Series([x is not None for x in self])
-
-    def dropna(self):
-        return _Series([x for x in self if x is not None])
-
-    def fillna(self, value):
-        return _Series([value if x is None else x for x in self])
-
-    def sum(self):
-        return sum(x for x in self if x is not None)
-
-    def tolist(self):
-        return list(self)
-
-    def mean(self):
-        vals = [x for x in self if x is not None]
-        return sum(vals) / len(vals) if vals else 0
-
-    def all(self):
-        return all(self)
-
-    @property
-    def iloc(self):
-        class _ILoc:
-            def __init__(self, data):
-                self.data = data
-
-            def __getitem__(self, idx):
-                return self.data[idx]
-
-        return _ILoc(self)
-
-    @property
-    def dtype(self):
-        for x in self:
-            if isinstance(x, (int, float)):
-                return float
-            if x is not None:
-                return object
-        return object
-
-
-class _DataFrame:
-    def __init__(self, data):
-        if isinstance(data, dict):
-            keys = list(data.keys())
-            rows = max(len(v) for v in data.values()) if data else 0
-            self._rows = [
-                {k: data[k][i] if i < len(data[k]) else None for k in keys}
-                for i in range(rows)
-            ]
-        elif isinstance(data, list):
-            self._rows = [dict(row) for row in data]
-        else:
-            self._rows = []
-
-    def __len__(self):
-        return len(self._rows)
-
-    def __contains__(self, key):
-        return any(key in r for r in self._rows)
-
-    def __getitem__(self, key):
-        return _Series([r.get(key) for r in self._rows])
-
-    def get(self, key, default):
-        return self[key] if key in self else default
-
-    @property
-    def empty(self):
-        return len(self._rows) == 0
-
-    @property
-    def columns(self):
-        cols = []
-        for r in self._rows:
-            for k in r:
-                if k not in cols:
-                    cols.append(k)
-        return cols
-
-    def groupby(self, key):
-        groups = {}
-        for r in self._rows:
-            groups.setdefault(r.get(key), []).append(r)
-        for k, rows in groups.items():
-            yield k, _DataFrame(rows)
-
-    def select_dtypes(self, include=None):
-        if include and (include == 'number' or include == ['number']):
-            numeric = []
-            for col in self.columns:
-                if all(isinstance(r.get(col), (int, float, type(None))) for r in self._rows):
-                    numeric.append(col)
-
-            class _Cols(list):
-                @property
-                def columns(self):
-                    return self
-
-            return _Cols(numeric)
-        return []
-
-    def to_csv(self, path, sep=',', index=True):
-        cols = self.columns
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(sep.join(cols) + '\n')
-            for r in self._rows:
-                f.write(sep.join('' if r.get(c) is None else str(r.get(c)) for c in cols) + '\n')
-
-
-def _concat(dfs, ignore_index=True):
-    rows = []
-    for df in dfs:
-        rows.extend(df._rows)
-    return _DataFrame(rows)
-
-
-def _to_datetime(val):
-    if isinstance(val, datetime.time):
-        return datetime.datetime.combine(datetime.date.today(), val)
-    for fmt in ("%H:%M", "%I:%M%p", "%H:%M:%S"):
-        try:
-            return datetime.datetime.strptime(str(val), fmt)
-        except ValueError:
-            continue
-    raise ValueError(f"Unrecognised time format: {val}")
-
-
-pd_stub = types.ModuleType("pandas")
-pd_stub.DataFrame = _DataFrame
-pd_stub.Series = _Series
-pd_stub.concat = _concat
-pd_stub.to_datetime = _to_datetime
-sys.modules.setdefault("pandas", pd_stub)
-
-# Ensure the project root is on the import path so ``sleep_analysis`` can be
-# imported when tests are executed directly.
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-if ROOT not in sys.path:
-    sys.path.insert(0, ROOT)
 
 import pandas as pd
 import pytest
 
+from sleep_analysis import log_parser
 from sleep_analysis.log_parser import (
     parse_log,
     compute_weekly_stats,
@@ -164,44 +11,83 @@ from sleep_analysis.log_parser import (
     _avg_time,
     _avg_offset,
     _parse_duration,
+    _parse_time,
     _parse_week_header,
 ) 
 from sleep_analysis.__main__ import _format_range
 
 
-class TestParseDuration(unittest.TestCase):
-    def test_parse_duration_basic(self):
-        self.assertAlmostEqual(_parse_duration('7:30'), 7.5)
-        self.assertEqual(_parse_duration('8'), 8.0)
-
-    def test_parse_duration_with_am_pm(self):
-        self.assertAlmostEqual(_parse_duration('9:15pm'), 21.25)
-        self.assertAlmostEqual(_parse_duration('12:05am'), 0.0833333, places=5)
-
-@pytest.fixture
-
-def sample_log_path():
-    return 'tests/input/logs.txt'
-
-
-def test_parse_log(sample_log_path):
-    df = parse_log(sample_log_path)
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        ('7:30', 7.5),
+        ('8', 8.0),
+        # values with am/pm are read as a time of day
+        ('9:15pm', 21.25),
+        ('12:05am', 5 / 60),
+    ],
+)
+def test_parse_duration(value, expected):
+    assert _parse_duration(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('value', ['1:-30', '-1:30', '+1:30', '1_0:30', '1: 30', '1:30:00', 'abc'])
+def test_parse_duration_rejects_malformed(value):
+    assert _parse_duration(value) is None
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        ('11:45', datetime.time(11, 45)),
+        ('7am', datetime.time(7, 0)),
+        ('12am', datetime.time(0, 0)),
+        ('12pm', datetime.time(12, 0)),
+        ('9:05PM', datetime.time(21, 5)),
+        # less common spellings
+        ('10.30', datetime.time(10, 30)),
+        ('10:30:15', datetime.time(10, 30, 15)),
+        ('10:30p', datetime.time(22, 30)),
+        ('10:30 pm', datetime.time(22, 30)),
+        ('10:30 p.m.', datetime.time(22, 30)),
+        ('10:30a.m.', datetime.time(10, 30)),
+    ],
+)
+def test_parse_time(value, expected):
+    assert _parse_time(value) == expected
+
+
+@pytest.mark.parametrize('value', ['.', '', 'abc', '9:75', '10:3', '10:30Z', '10:30:00.5'])
+def test_parse_time_rejects_unsupported(value):
+    assert _parse_time(value) is None
+
+
+# the sample log and its weekly stats are parsed once and shared; the tests
+# below only read them
+@pytest.fixture(scope="session")
+def parsed_log():
+    return parse_log('tests/input/logs.txt')
+
+
+@pytest.fixture(scope="session")
+def weekly(parsed_log):
+    return compute_weekly_stats(parsed_log)
+
+
+def test_parse_log(parsed_log):
+    df = parsed_log
     assert len(df) == 14
     assert set(df['week_label']) == {'0101-0107', '0108-0114'}
     assert df['wind_down_start_time'].notna().all()
 
 
-def test_compute_weekly_stats(sample_log_path):
-    df = parse_log(sample_log_path)
-    weekly = compute_weekly_stats(df)
+def test_compute_weekly_stats(weekly):
     assert set(weekly.keys()) == {'0101-0107', '0108-0114'}
     assert weekly['0101-0107']['total_drinks'].iloc[0] == 3
     assert weekly['0108-0114']['total_drinks'].iloc[0] == 7
 
 
-def test_compute_overall_stats(sample_log_path):
-    df = parse_log(sample_log_path)
-    weekly = compute_weekly_stats(df)
+def test_compute_overall_stats(weekly):
     overall = compute_overall_stats(weekly)
     assert len(overall) == 1
     assert 'total_drinks_mean' not in overall.columns
@@ -236,6 +122,16 @@ def test_parse_week_header_cross_year():
     assert days[-1] == datetime.date(2026, 1, 5)
 
 
+def test_parse_week_header_end_month_omitted():
+    label, days = _parse_week_header('Thu6/19-Wed25')
+    assert label == '0619-0625'
+    assert days[-1] == datetime.date(2025, 6, 25)
+
+
+def test_parse_week_header_rejects_non_header():
+    assert _parse_week_header('6. What time did you wake up? 7am') is None
+
+
 def test_parse_log_duplicate_dates(tmp_path):
     log = tmp_path / 'log.txt'
     log.write_text(
@@ -260,6 +156,18 @@ def test_avg_time_across_midnight():
     assert avg.strftime('%H:%M') == '05:11'
 
 
+def test_avg_time_half_minute_boundary():
+    # the exact mean falls within rounding error of 01:18:30; a plain
+    # left-to-right float sum rounds it down to 01:18
+    times = [
+        datetime.time(2, 40),
+        datetime.time(23, 57),
+        datetime.time(1, 44),
+        datetime.time(13, 44),
+    ]
+    assert _avg_time(times).strftime('%H:%M') == '01:19'
+
+
 def test_compute_weekly_stats_cross_midnight():
     times = [
         datetime.time(6, 50),
@@ -313,8 +221,77 @@ def test_parse_log_handles_blank_lines_and_notes(tmp_path):
     assert len(df) == 3
 
 
+def test_parse_log_blank_question_line(tmp_path):
+    log = tmp_path / 'log.txt'
+    log.write_text(
+        '    1/1-1/3\n'
+        '        6. What time did you wake up? 7am 7am 7am\n'
+        '        10. Quality of your sleep (1-10)?\n'
+        '    1/4-1/6\n'
+        '        1b. What time start winding down? 1am 1am 1am\n'
+        '        6. What time did you wake up? 7am 7am 7am\n'
+    )
+    df = parse_log(str(log))
+    assert len(df) == 6
+    # a question with no answers doesn't add a column, and columns keep the
+    # order in which answers first appear
+    assert list(df.columns) == ['date', 'week_label', 'wake_up_time', 'wind_down_start_time']
+
+
 def test_parse_log_week_header_without_indent():
     df = parse_log('tests/input/long-single-week.txt')
     assert len(df) == 3
     assert set(df['week_label']) == {'0619-0621'}
     assert df['wind_down_start_time'][0] is not None
+
+
+@pytest.fixture
+def cached_log(tmp_path, monkeypatch):
+    """Point the parse cache at ``tmp_path`` and count real parses."""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    calls = []
+    real_parse = log_parser._parse_log
+
+    def counting_parse(path):
+        calls.append(path)
+        return real_parse(path)
+
+    monkeypatch.setattr(log_parser, '_parse_log', counting_parse)
+    log = tmp_path / 'log.txt'
+    log.write_text(
+        '    1/1-1/3\n'
+        '        6. What time did you wake up? 7am 7am 7am\n'
+    )
+    return log, calls
+
+
+def test_parse_log_cache_hit(cached_log):
+    log, calls = cached_log
+    first = parse_log(str(log), use_cache=True)
+    second = parse_log(str(log), use_cache=True)
+    assert len(calls) == 1
+    assert list(second['date']) == list(first['date'])
+
+
+def test_parse_log_cache_invalidated_by_change(cached_log, tmp_path):
+    log, calls = cached_log
+    parse_log(str(log), use_cache=True)
+    log.write_text(
+        '    1/1-1/4\n'
+        '        6. What time did you wake up? 7am 7am 7am 7am\n'
+    )
+    df = parse_log(str(log), use_cache=True)
+    assert len(calls) == 2
+    assert len(df) == 4
+    # the superseded entry is replaced rather than left behind
+    assert len(list((tmp_path / 'cache' / 'sleep_analysis').iterdir())) == 1
+
+
+def test_parse_log_corrupt_cache_entry(cached_log, tmp_path):
+    log, calls = cached_log
+    parse_log(str(log), use_cache=True)
+    (entry,) = (tmp_path / 'cache' / 'sleep_analysis').iterdir()
+    entry.write_bytes(b'not a pickle')
+    df = parse_log(str(log), use_cache=True)
+    assert len(calls) == 2
+    assert len(df) == 3